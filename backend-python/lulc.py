@@ -1,125 +1,146 @@
 import numpy as np
+import numexpr as ne
 import rasterio
-import pandas as pd
+from rasterio.io import DatasetReader
+from rasterio.windows import Window
 from PIL import Image
 import matplotlib
 matplotlib.use('Agg')  # Non-interactive backend
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+import csv
 import logging
+import multiprocessing
 import os
+import threading
+from contextlib import ExitStack, contextmanager
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from lulc_kernels import (
+    classify_bands, warmup, BUILT_UP, WATER, FOREST, VEGETATION, BARREN, NUM_CLASSES
+)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Let numexpr use every core
+ne.set_num_threads(min(os.cpu_count() or 1, ne.MAX_THREADS))
+
+# Band order of the multispectral inputs (B1..B5)
+BAND_NAMES = ("blue", "green", "red", "nir", "swir")
+
+# GDAL settings for reading: larger block cache, multithreaded decoding
+GDAL_OPTIONS = {
+    "GDAL_CACHEMAX": 512,  # MB
+    "GDAL_NUM_THREADS": "ALL_CPUS"
+}
+
+# Pixels per read window in read_and_classify: full-width strips this large
+# keep read calls and kernel launches few, with small NIR/SWIR buffers
+READ_WINDOW_PIXELS = 1 << 20
+
+# Pixels sampled per band to estimate the RGB preview stretch percentiles
+PREVIEW_SAMPLE_SIZE = 200_000
+
+# Comparison graph size (inches) and resolution: 1000x600 px
+COMPARISON_GRAPH_SIZE = (10, 6)
+COMPARISON_GRAPH_DPI = 100
+
+# matplotlib's default subplot margins; tight_layout iterates from the current ones
+COMPARISON_GRAPH_SUBPLOT_DEFAULTS = {
+    key: matplotlib.rcParams[f"figure.subplot.{key}"]
+    for key in ("left", "right", "bottom", "top", "wspace", "hspace")
+}
+
+# Figure reused across comparison graphs, guarded for concurrent analyses
+_comparison_figure = None
+_comparison_figure_lock = threading.Lock()
 
-def read_and_preprocess(image_path):
+# Images smaller than this (pixels) are processed in the calling process:
+# below it the pool's IPC and scheduling cost more than the parallelism saves
+PARALLEL_MIN_PIXELS = 4_000_000
+
+# Worker pool for the per-image work, created on first use and kept alive
+_executor = None
+_executor_lock = threading.Lock()
+
+# Land cover categories and their labels in the classified raster
+LAND_COVER_CLASSES = {
+    "Built-up Area": BUILT_UP,
+    "Water": WATER,
+    "Forest": FOREST,
+    "Vegetation": VEGETATION,
+    "Barren Land": BARREN
+}
+
+
+@contextmanager
+def open_raster(image_path):
     """
-    Read and preprocess multispectral image
+    Open a raster, or pass through a dataset that is already open
+    Datasets passed in are left open for the caller to close
     
     Args:
-        image_path (str): Path to the raster image
+        image_path (str or rasterio.io.DatasetReader): Path or open dataset
         
-    Returns:
-        numpy.ndarray: Preprocessed image array (H, W, Bands)
+    Yields:
+        rasterio.io.DatasetReader: Open dataset
     """
-    try:
+    if isinstance(image_path, DatasetReader):
+        yield image_path
+    else:
         with rasterio.open(image_path) as src:
-            image = src.read()
-            image = np.moveaxis(image, 0, -1)
-            logger.info(f"Loaded image with shape: {image.shape}")
-        
-        # Normalize to 0-1 range
-        image = image.astype(np.float32)
-        if image.max() > 1.0:
-            image = image / 255.0
-        
-        return image
-    except Exception as e:
-        logger.error(f"Error reading image {image_path}: {str(e)}")
-        raise
+            yield src
 
 
-def generate_rgb_preview(image_path, output_path):
+def generate_rgb_preview_from_bands(red, green, blue, output_path):
     """
-    Generate an RGB preview using bands for visualization
+    Generate an RGB preview from already loaded bands
     Creates a natural color composite (true color) with transparent background
     
     Args:
-        image_path (str): Path to input multispectral image
+        red, green, blue (numpy.ndarray): 2D float band arrays, non-finite
+            values are replaced with 0 in place
         output_path (str): Path to save RGB preview
     """
     try:
-        with rasterio.open(image_path) as src:
-            # Check number of bands available
-            num_bands = src.count
-            logger.info(f"Image has {num_bands} bands")
-            
-            if num_bands >= 3:
-                # For natural color (true color), typically bands are ordered as:
-                # Band 1 = Blue, Band 2 = Green, Band 3 = Red (for many processed TIFs)
-                red = src.read(3).astype(np.float64)
-                green = src.read(2).astype(np.float64)
-                blue = src.read(1).astype(np.float64)
-                
-                logger.info(f"Using bands 3,2,1 for RGB")
-                logger.info(f"Red band - min: {red.min()}, max: {red.max()}, mean: {red.mean()}")
-                logger.info(f"Green band - min: {green.min()}, max: {green.max()}, mean: {green.mean()}")
-                logger.info(f"Blue band - min: {blue.min()}, max: {blue.max()}, mean: {blue.mean()}")
-            elif num_bands == 1:
-                # Grayscale image
-                gray = src.read(1).astype(np.float64)
-                red = green = blue = gray
-            else:
-                logger.warning("Insufficient bands for RGB preview")
-                placeholder = np.zeros((100, 100, 3), dtype=np.uint8)
-                Image.fromarray(placeholder).save(output_path)
-                return
-        
         # Create a mask for valid data (non-zero pixels)
         valid_mask = (red > 0) | (green > 0) | (blue > 0)
         
-        # Stack bands
-        rgb = np.dstack((red, green, blue))
-        
-        # Remove any NaN or infinite values
-        rgb = np.nan_to_num(rgb, nan=0.0, posinf=0.0, neginf=0.0)
+        # Preallocate the final RGBA image and write each channel in place
+        rgba = np.empty(red.shape + (4,), dtype=np.uint8)
         
         # Apply percentile-based histogram stretch for each band
-        for i in range(3):
-            band = rgb[:, :, i]
+        rng = np.random.default_rng(0)
+        for i, band in enumerate((red, green, blue)):
+            # Remove any NaN or infinite values in place
+            band[~np.isfinite(band)] = 0
             # Get valid (non-zero) values for percentile calculation
             valid_pixels = band[band > 0]
             
             if len(valid_pixels) > 0:
-                # Use 2nd and 98th percentile for contrast stretching
-                p2 = np.percentile(valid_pixels, 2)
-                p98 = np.percentile(valid_pixels, 98)
+                # Estimate the 2nd and 98th percentiles on a uniform subsample
+                if valid_pixels.size > PREVIEW_SAMPLE_SIZE:
+                    valid_pixels = rng.choice(valid_pixels, PREVIEW_SAMPLE_SIZE, replace=False)
+                p2, p98 = np.quantile(valid_pixels, [0.02, 0.98])
                 
                 logger.info(f"Band {i} - p2: {p2:.2f}, p98: {p98:.2f}")
                 
                 # Clip and normalize to 0-1 range
-                band_clipped = np.clip(band, p2, p98)
+                band_normalized = np.clip(band, p2, p98)
                 if (p98 - p2) > 0:
-                    band_normalized = (band_clipped - p2) / (p98 - p2)
-                else:
-                    band_normalized = band_clipped
-                    
-                rgb[:, :, i] = band_normalized
+                    band_normalized -= p2
+                    band_normalized /= p98 - p2
+                np.clip(band_normalized, 0, 1, out=band_normalized)
+                
+                # Convert to 8-bit
+                np.multiply(band_normalized, 255, out=rgba[:, :, i], casting='unsafe')
             else:
-                rgb[:, :, i] = 0
-        
-        # Clip to 0-1 range
-        rgb = np.clip(rgb, 0, 1)
-        
-        # Convert to 8-bit
-        rgb_8bit = (rgb * 255).astype(np.uint8)
-        
-        # Create RGBA image with alpha channel for transparency
-        rgba = np.dstack((rgb_8bit, np.zeros(rgb_8bit.shape[:2], dtype=np.uint8)))
+                rgba[:, :, i] = 0
         
         # Set alpha channel: 255 (opaque) for valid data, 0 (transparent) for no-data
-        rgba[:, :, 3] = np.where(valid_mask, 255, 0)
+        np.multiply(valid_mask, 255, out=rgba[:, :, 3], casting='unsafe')
         
         logger.info(f"Final RGBA - shape: {rgba.shape}, valid pixels: {np.sum(valid_mask)}")
         
@@ -146,175 +167,151 @@ def apply_histogram_stretch(image, percentile_low=2, percentile_high=98):
     Returns:
         numpy.ndarray: Stretched image
     """
-    stretched = np.zeros_like(image)
-    for i in range(image.shape[-1]):
-        band = image[:, :, i]
-        p_low = np.percentile(band, percentile_low)
-        p_high = np.percentile(band, percentile_high)
-        stretched[:, :, i] = np.clip((band - p_low) / (p_high - p_low), 0, 1)
-    return stretched
+    # Per-band percentiles in a single reduction, broadcast over (H, W), in the
+    # image's float precision (float32 for 8/16-bit and float32 images)
+    float_dtype = np.result_type(image.dtype, np.float32)
+    p = np.percentile(image, [percentile_low, percentile_high], axis=(0, 1)).astype(float_dtype, copy=False)
+    lo, hi = p[0], p[1]
+    
+    # Fused subtract/divide/clip in one pass
+    return ne.evaluate(
+        "where((image - lo) / (hi - lo) < 0, 0, where((image - lo) / (hi - lo) > 1, 1, (image - lo) / (hi - lo)))"
+    )
 
 
-def calculate_ndvi(image):
+def read_and_classify(image_path):
     """
-    Calculate Normalized Difference Vegetation Index
-    NDVI = (NIR - Red) / (NIR + Red)
+    Read an image once, in full-width strips, classifying land cover as it goes
+    Each strip's NIR/SWIR bands are read into reused buffers and passed with
+    the red and green bands through the fused index + classification kernel.
+    The visible bands are kept whole for the RGB preview
     
     Args:
-        image (numpy.ndarray): Multispectral image
+        image_path (str or rasterio.io.DatasetReader): Path to the raster image, or an open dataset
         
     Returns:
-        numpy.ndarray: NDVI values
+        tuple: (uint8 label raster (see LAND_COVER_CLASSES, 0 = other),
+                (red, green, blue) float32 bands for the RGB preview or None
+                if the image has too few bands)
     """
-    if image.shape[2] < 4:
-        logger.warning(f"Insufficient bands for NDVI calculation. Image has {image.shape[2]} bands, need at least 4")
-        # Return zeros array as fallback
-        return np.zeros((image.shape[0], image.shape[1]))
-    
-    nir = image[:, :, 3]   # B4 (NIR band)
-    red = image[:, :, 2]   # B3 (Red band)
-    
-    ndvi = (nir - red) / (nir + red + 1e-8)
-    return np.clip(ndvi, -1, 1)
-
-
-def calculate_ndwi(image):
-    """
-    Calculate Normalized Difference Water Index
-    NDWI = (Green - NIR) / (Green + NIR)
-    
-    Args:
-        image (numpy.ndarray): Multispectral image
-        
-    Returns:
-        numpy.ndarray: NDWI values
-    """
-    if image.shape[2] < 4:
-        logger.warning(f"Insufficient bands for NDWI calculation. Image has {image.shape[2]} bands, need at least 4")
-        # Return zeros array as fallback
-        return np.zeros((image.shape[0], image.shape[1]))
-    
-    green = image[:, :, 1]  # B2 (Green band)
-    nir = image[:, :, 3]    # B4 (NIR band)
-    
-    ndwi = (green - nir) / (green + nir + 1e-8)
-    return np.clip(ndwi, -1, 1)
-
-
-def calculate_ndbi(image):
-    """
-    Calculate Normalized Difference Built-up Index
-    NDBI = (SWIR - NIR) / (SWIR + NIR)
-    
-    Args:
-        image (numpy.ndarray): Multispectral image
+    try:
+        with open_raster(image_path) as src:
+            logger.info(f"Reading image with {src.count} bands of shape: {(src.height, src.width)}")
+            shape = (src.height, src.width)
+            labels = np.empty(shape, dtype=np.uint8)
+            
+            # Bands kept whole: B3, B2, B1 for a true color preview, or the single
+            # band of a grayscale image. Green and red are also used for the indices
+            if src.count >= 3:
+                whole_indexes = (3, 2, 1)
+            elif src.count == 1:
+                whole_indexes = (1,)
+            else:
+                whole_indexes = ()
+            whole = {k: np.empty(shape, dtype=np.float32) for k in whole_indexes}
+            
+            classified = src.count >= 4
+            if not classified:
+                # NDVI, NDWI and NDBI are all zero, which classifies as barren
+                logger.warning(f"Insufficient bands for NDVI/NDWI/NDBI calculation. Image has {src.count} bands, need at least 4")
+                labels.fill(BARREN)
+            elif src.count < 5:
+                # Using NIR in place of SWIR gives NDBI = 0
+                logger.warning(f"Insufficient bands for NDBI calculation. Image has {src.count} bands, need at least 5")
+            swir_index = 5 if src.count >= 5 else 4
+            
+            # Strips span the full width and a whole number of blocks, so reads
+            # line up with the file's blocks and every array is C-contiguous
+            block_height = src.block_shapes[0][0]
+            strip_height = min(src.height, max(block_height, READ_WINDOW_PIXELS // src.width // block_height * block_height))
+            strip_indexes = {4, swir_index} if classified else set()
+            buffers = {k: np.empty((strip_height, src.width), dtype=np.float32) for k in strip_indexes}
+            
+            if whole or buffers:
+                for row_off in range(0, src.height, strip_height):
+                    h = min(strip_height, src.height - row_off)
+                    window = Window(0, row_off, src.width, h)
+                    rows = slice(row_off, row_off + h)
+                    strips = {k: src.read(k, window=window, out=band[rows]) for k, band in whole.items()}
+                    for k, buffer in buffers.items():
+                        strips[k] = src.read(k, window=window, out=buffer[:h])
+                    
+                    if classified:
+                        classify_bands(strips[2], strips[3], strips[4], strips[swir_index], labels[rows])
         
-    Returns:
-        numpy.ndarray: NDBI values
-    """
-    if image.shape[2] < 5:
-        logger.warning(f"Insufficient bands for NDBI calculation. Image has {image.shape[2]} bands, need at least 5")
-        # Return zeros array as fallback
-        return np.zeros((image.shape[0], image.shape[1]))
-    
-    swir = image[:, :, 4]   # B5 (SWIR band)
-    nir = image[:, :, 3]    # B4 (NIR band)
-    
-    ndbi = (swir - nir) / (swir + nir + 1e-8)
-    return np.clip(ndbi, -1, 1)
-
-
-def classify_land_cover(ndvi, ndwi, ndbi):
-    """
-    Classify land cover based on spectral indices
-    
-    Args:
-        ndvi (numpy.ndarray): NDVI values
-        ndwi (numpy.ndarray): NDWI values
-        ndbi (numpy.ndarray): NDBI values
+        if len(whole) == 3:
+            rgb = (whole[3], whole[2], whole[1])
+        elif len(whole) == 1:
+            rgb = (whole[1],) * 3
+        else:
+            rgb = None
         
-    Returns:
-        tuple: Binary masks for (built_up, water, forest, vegetation, barren)
-    """
-    # Primary classification
-    built_up = (ndbi > 0).astype(float)
-    forest = (ndvi > 0.5).astype(float)
-    vegetation = ((ndvi > 0.1) & (ndvi <= 0.5)).astype(float)
-    water = (ndwi > 0).astype(float)
-    barren = ((ndvi >= -0.1) & (ndvi <= 0.1)).astype(float)
-    
-    # Priority-based masking
-    vegetation[built_up > 0] = 0
-    forest[built_up > 0] = 0
-    barren[built_up > 0] = 0
-    
-    forest[water > 0] = 0
-    vegetation[water > 0] = 0
-    barren[water > 0] = 0
-    built_up[water > 0] = 0
-    
-    return built_up, water, forest, vegetation, barren
+        return labels, rgb
+    except Exception as e:
+        logger.error(f"Error reading image {getattr(image_path, 'name', image_path)}: {str(e)}")
+        raise
 
 
-def calculate_land_cover_percentages(built_up, water, forest, vegetation, barren):
+def calculate_land_cover_percentages(labels):
     """
     Calculate percentage of each land cover class
     
     Args:
-        built_up, water, forest, vegetation, barren (numpy.ndarray): Binary masks
+        labels (numpy.ndarray): Label raster from read_and_classify
         
     Returns:
         dict: Percentages for each class
     """
-    total_pixels = built_up.size
+    counts = np.bincount(labels.ravel(), minlength=NUM_CLASSES)
+    total_pixels = labels.size
     
     return {
-        "Built-up Area": np.sum(built_up) / total_pixels * 100,
-        "Water": np.sum(water) / total_pixels * 100,
-        "Forest": np.sum(forest) / total_pixels * 100,
-        "Vegetation": np.sum(vegetation) / total_pixels * 100,
-        "Barren Land": np.sum(barren) / total_pixels * 100
+        category: counts[label] / total_pixels * 100
+        for category, label in LAND_COVER_CLASSES.items()
     }
 
 
-def create_change_map(masks1, masks2, output_path="change_map.png"):
+def create_change_map(labels1, labels2, output_path="change_map.png"):
     """
     Create a binary change detection map (white = change, black = no change)
     
     Args:
-        masks1 (tuple): Land cover masks from image 1
-        masks2 (tuple): Land cover masks from image 2
+        labels1 (numpy.ndarray): Land cover label raster from image 1
+        labels2 (numpy.ndarray): Land cover label raster from image 2
         output_path (str): Path to save change map
         
     Returns:
         numpy.ndarray: Change map array
     """
-    built1, water1, forest1, veg1, bar1 = masks1
-    built2, water2, forest2, veg2, bar2 = masks2
-    
-    # Detect changes with threshold
-    change_threshold = 0.1
-    
-    built_up_change = (np.abs(built2 - built1) > change_threshold)
-    water_change = (np.abs(water2 - water1) > change_threshold)
-    forest_change = (np.abs(forest2 - forest1) > change_threshold)
-    vegetation_change = (np.abs(veg2 - veg1) > change_threshold)
-    barren_change = (np.abs(bar2 - bar1) > change_threshold)
+    # A pixel changed if its land cover class differs between the images
+    change = (labels1 != labels2)
     
-    # Combine all changes
-    total_change = built_up_change | water_change | forest_change | vegetation_change | barren_change
+    # Create binary change map in place (white = change, black = no change)
+    change_map = change.view(np.uint8)
+    np.multiply(change_map, 255, out=change_map)
     
-    # Create binary change map (white = change, black = no change)
-    change_map = np.zeros((total_change.shape[0], total_change.shape[1]), dtype=np.uint8)
-    change_map[total_change] = 255  # White for changes
-    
-    # Save as black and white image
-    Image.fromarray(change_map).save(output_path)
+    # Save as black and white image; fast compression suits a binary mask
+    Image.fromarray(change_map, mode='L').save(output_path, optimize=False, compress_level=1)
     
     logger.info(f"Change map saved to {output_path}")
     return change_map
 
 
+def _get_comparison_figure():
+    """
+    Return the figure reused for every comparison graph, creating it on first use
+    Reusing it avoids reallocating the Agg canvas on each analysis
+    
+    Returns:
+        tuple: (Figure, Axes)
+    """
+    global _comparison_figure
+    if _comparison_figure is None:
+        fig = Figure(figsize=COMPARISON_GRAPH_SIZE)
+        _comparison_figure = (fig, fig.add_subplot())
+    return _comparison_figure
+
+
 def generate_comparison_graph(perc1, perc2, output_path="comparison_graph.png", file1_name="Image 1", file2_name="Image 2"):
     """
     Generate a scatter plot comparing land cover percentages between two images
@@ -330,45 +327,144 @@ def generate_comparison_graph(perc1, perc2, output_path="comparison_graph.png",
     image1_percentages = list(perc1.values())
     image2_percentages = list(perc2.values())
     
-    # Plotting the scatter plot
-    plt.figure(figsize=(10, 6))
-    
-    # Scatter plot for Image 1
-    plt.scatter(categories, image1_percentages, marker='o', label=file1_name, color='blue', s=100)
+    with _comparison_figure_lock:
+        fig, ax = _get_comparison_figure()
+        ax.cla()
+        
+        # Scatter plot for Image 1
+        ax.scatter(categories, image1_percentages, marker='o', label=file1_name, color='blue', s=100)
+        
+        # Scatter plot for Image 2
+        ax.scatter(categories, image2_percentages, marker='o', label=file2_name, color='green', s=100)
+        
+        # Adding labels and title
+        ax.set_xlabel('Land Cover Categories', fontsize=12)
+        ax.set_ylabel('Percentage (%)', fontsize=12)
+        ax.set_title('Land Cover Changes', fontsize=14)
+        
+        # Set y-axis scale to 0-100 with intervals of 10
+        ax.set_ylim(0, 100)
+        ax.set_yticks(range(0, 101, 10))  # Y-axis ticks at intervals of 10
+        
+        # Display values at each point, dynamically adjusting label positions to avoid overlap
+        p1 = np.asarray(image1_percentages)
+        p2 = np.asarray(image2_percentages)
+        hi1 = p1 > p2
+        y1 = p1 + np.where(hi1, 2, 10)
+        y2 = p2 + np.where(hi1, 10, 2)
+        for values, ys, color in ((p1, y1, 'blue'), (p2, y2, 'green')):
+            for i, (value, y) in enumerate(zip(values, ys)):
+                ax.text(i, y, f'{value:.2f}%', color=color, ha='center', fontsize=10)
+        
+        # Show gridlines for better visualization
+        ax.grid(True)
+        
+        # Adding a legend to distinguish between Image 1 and Image 2
+        ax.legend(loc='upper right')
+        
+        # Start tight_layout from the default margins, not the previous graph's
+        fig.subplots_adjust(**COMPARISON_GRAPH_SUBPLOT_DEFAULTS)
+        fig.tight_layout()
+        
+        # Save at screen resolution; the figure is already sized to the output
+        fig.savefig(output_path, dpi=COMPARISON_GRAPH_DPI)
     
-    # Scatter plot for Image 2
-    plt.scatter(categories, image2_percentages, marker='o', label=file2_name, color='green', s=100)
+    logger.info(f"Comparison graph saved to {output_path}")
+
+
+def process_one(image_path, output_dir, name):
+    """
+    Run the per-image part of the analysis: RGB preview, classification
+    and land cover percentages
     
-    # Adding labels and title
-    plt.xlabel('Land Cover Categories', fontsize=12)
-    plt.ylabel('Percentage (%)', fontsize=12)
-    plt.title('Land Cover Changes', fontsize=14)
+    Args:
+        image_path (str or rasterio.io.DatasetReader): Path to the image, or an open dataset
+        output_dir (str): Directory to save the preview
+        name (str): Output name of the image (e.g. "image1")
+        
+    Returns:
+        tuple: (label raster, land cover percentages)
+    """
+    preview_path = f"{output_dir}/preview_{name}.png"
+    with rasterio.Env(**GDAL_OPTIONS), open_raster(image_path) as src:
+        labels, rgb = read_and_classify(src)
     
-    # Set y-axis scale to 0-100 with intervals of 10
-    plt.ylim(0, 100)
-    plt.yticks(range(0, 101, 10))  # Y-axis ticks at intervals of 10
+    if rgb is not None:
+        generate_rgb_preview_from_bands(*rgb, preview_path)
+    else:
+        logger.warning("Insufficient bands for RGB preview")
+        placeholder = np.zeros((100, 100, 3), dtype=np.uint8)
+        Image.fromarray(placeholder).save(preview_path)
     
-    # Display values at each point, dynamically adjusting label positions to avoid overlap
-    for i, category in enumerate(categories):
-        if image1_percentages[i] > image2_percentages[i]:
-            plt.text(i, image1_percentages[i] + 2, f'{image1_percentages[i]:.2f}%', color='blue', ha='center', fontsize=10)
-            plt.text(i, image2_percentages[i] + 10, f'{image2_percentages[i]:.2f}%', color='green', ha='center', fontsize=10)
-        else:
-            plt.text(i, image1_percentages[i] + 10, f'{image1_percentages[i]:.2f}%', color='blue', ha='center', fontsize=10)
-            plt.text(i, image2_percentages[i] + 2, f'{image2_percentages[i]:.2f}%', color='green', ha='center', fontsize=10)
+    return labels, calculate_land_cover_percentages(labels)
+
+
+def _get_executor():
+    """
+    Return the process pool used for per-image work, creating it on first use
+    Workers are spawned once and reused, so later analyses skip interpreter
+    startup and module imports
     
-    # Show gridlines for better visualization
-    plt.grid(True)
+    Returns:
+        ProcessPoolExecutor: Two-worker pool
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn: forking a process that may already host Numba's worker threads is unsafe
+            # Workers compile/load the kernels as they start, before their first job
+            _executor = ProcessPoolExecutor(
+                max_workers=2,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=warmup
+            )
+        return _executor
+
+
+def _discard_executor():
+    """
+    Shut down and forget a broken pool so the next analysis starts a new one
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def process_images(image1_path, image2_path, output_dir):
+    """
+    Run process_one for both images, in parallel worker processes for large
+    images and in the calling process for small ones
+    Both images are opened once up front to check their size; small images
+    are then processed from those same datasets
     
-    # Adding a legend to distinguish between Image 1 and Image 2
-    plt.legend(loc='upper right')
+    Args:
+        image1_path (str): Path to first image
+        image2_path (str): Path to second image
+        output_dir (str): Directory to save the previews
+        
+    Returns:
+        dict: (label raster, land cover percentages) keyed by "image1" and "image2"
+    """
+    jobs = {"image1": image1_path, "image2": image2_path}
     
-    # Display the plot
-    plt.tight_layout()
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
-    plt.close()
+    with rasterio.Env(**GDAL_OPTIONS), ExitStack() as stack:
+        sources = {name: stack.enter_context(open_raster(path)) for name, path in jobs.items()}
+        if max(src.width * src.height for src in sources.values()) < PARALLEL_MIN_PIXELS:
+            return {name: process_one(src, output_dir, name) for name, src in sources.items()}
     
-    logger.info(f"Comparison graph saved to {output_path}")
+    # Worker processes cannot share the open datasets and open the files themselves
+    try:
+        executor = _get_executor()
+        futures = {executor.submit(process_one, path, output_dir, name): name for name, path in jobs.items()}
+        return {futures[future]: future.result() for future in as_completed(futures)}
+    except BrokenProcessPool:
+        # e.g. a worker crashed, or the calling script has no __main__ guard
+        logger.warning("Worker pool failed, processing images in the calling process", exc_info=True)
+        _discard_executor()
+    
+    return {name: process_one(path, output_dir, name) for name, path in jobs.items()}
 
 
 def run_lulc_change_analysis(image1_path, image2_path, output_dir="./outputs", file1_name="Image 1", file2_name="Image 2"):
@@ -394,38 +490,15 @@ def run_lulc_change_analysis(image1_path, image2_path, output_dir="./outputs", f
     logger.info(f"File 2: {file2_name}")
     logger.info("=" * 60)
     
-    # Step 1: Generate RGB previews
-    logger.info("STEP 1/7: Generating RGB previews")
-    generate_rgb_preview(image1_path, f"{output_dir}/preview_image1.png")
-    generate_rgb_preview(image2_path, f"{output_dir}/preview_image2.png")
-    
-    # Step 2: Read and preprocess images
-    logger.info("STEP 2/7: Reading and preprocessing images")
-    image1 = read_and_preprocess(image1_path)
-    image2 = read_and_preprocess(image2_path)
-    
-    # Step 3: Calculate spectral indices
-    logger.info("STEP 3/7: Calculating spectral indices (NDVI, NDWI, NDBI)")
-    ndvi1 = calculate_ndvi(image1)
-    ndvi2 = calculate_ndvi(image2)
-    ndwi1 = calculate_ndwi(image1)
-    ndwi2 = calculate_ndwi(image2)
-    ndbi1 = calculate_ndbi(image1)
-    ndbi2 = calculate_ndbi(image2)
-    
-    # Step 4: Classify land cover
-    logger.info("STEP 4/7: Classifying land cover")
-    masks1 = classify_land_cover(ndvi1, ndwi1, ndbi1)
-    masks2 = classify_land_cover(ndvi2, ndwi2, ndbi2)
-    
-    # Step 5: Create change map
-    logger.info("STEP 5/7: Creating change detection map")
-    create_change_map(masks1, masks2, f"{output_dir}/change_map.png")
-    
-    # Step 6: Calculate percentages
-    logger.info("STEP 6/7: Calculating land cover percentages")
-    perc1 = calculate_land_cover_percentages(*masks1)
-    perc2 = calculate_land_cover_percentages(*masks2)
+    # Step 1: Process both images
+    logger.info("STEP 1/3: Processing images (RGB preview, spectral indices, land cover classification)")
+    processed = process_images(image1_path, image2_path, output_dir)
+    labels1, perc1 = processed["image1"]
+    labels2, perc2 = processed["image2"]
+    
+    # Step 2: Create change map
+    logger.info("STEP 2/3: Creating change detection map")
+    create_change_map(labels1, labels2, f"{output_dir}/change_map.png")
     
     # Calculate changes
     change_stats = {k: perc2[k] - perc1[k] for k in perc1}
@@ -437,19 +510,16 @@ def run_lulc_change_analysis(image1_path, image2_path, output_dir="./outputs", f
     for category in perc1.keys():
         logger.info(f"{category:20s} | Image1: {perc1[category]:6.2f}% | Image2: {perc2[category]:6.2f}% | Change: {change_stats[category]:+6.2f}%")
     
-    # Step 7: Generate comparison graph and save results
-    logger.info("\nSTEP 7/7: Generating comparison graph and saving results")
+    # Step 3: Generate comparison graph and save results
+    logger.info("\nSTEP 3/3: Generating comparison graph and saving results")
     generate_comparison_graph(perc1, perc2, f"{output_dir}/comparison_graph.png", file1_name, file2_name)
     
     # Save change matrix
-    df = pd.DataFrame({
-        "Category": list(perc1.keys()),
-        "Image 1 (%)": list(perc1.values()),
-        "Image 2 (%)": list(perc2.values()),
-        "Change (%)": list(change_stats.values()),
-        "Absolute Change (%)": [abs(v) for v in change_stats.values()]
-    })
-    df.to_csv(f"{output_dir}/change_matrix.csv", index=False)
+    with open(f"{output_dir}/change_matrix.csv", "w", newline="") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow(["Category", "Image 1 (%)", "Image 2 (%)", "Change (%)", "Absolute Change (%)"])
+        for category in perc1:
+            writer.writerow([category, perc1[category], perc2[category], change_stats[category], abs(change_stats[category])])
     
     logger.info("=" * 60)
     logger.info("Analysis Complete!")
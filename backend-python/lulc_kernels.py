@@ -0,0 +1,170 @@
+import threading
+
+import numexpr as ne
+import numpy as np
+
+# Numba is optional: without it the kernels fall back to numexpr
+try:
+    from numba import njit, prange, threading_layer
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# Numba's workqueue threading layer, its fallback when neither OpenMP nor TBB
+# is available, aborts if parallel kernels are launched from several threads
+# at once (e.g. concurrent API requests); such launches take this lock
+_launch_lock = threading.Lock()
+
+# Kept in float32 so the kernel matches NumPy's float32 arithmetic
+EPS = np.float32(1e-8)
+
+# fastmath without 'arcp'/'reassoc': approximate reciprocals shift pixels that
+# sit exactly on a class threshold (e.g. NDVI == 0.5 for 8-bit inputs)
+# and without 'nnan'/'ninf': vectorized loops would then label NaN nodata
+# pixels as water instead of other
+FASTMATH = {'nsz', 'contract'}
+
+# Land cover labels written by classify_bands()
+OTHER = 0
+BUILT_UP = 1
+WATER = 2
+FOREST = 3
+VEGETATION = 4
+BARREN = 5
+NUM_CLASSES = 6
+
+# numexpr form of the clipped normalized difference (a - b) / (a + b)
+_ND = "((a - b) / (a + b + eps))"
+NORMALIZED_DIFFERENCE = f"where({_ND} < -1, -1, where({_ND} > 1, 1, {_ND}))"
+
+# numexpr form of the per-pixel classification, same priority as _label()
+LABEL = (
+    f"where(ndwi > 0, {WATER}, where(ndbi > 0, {BUILT_UP}, "
+    f"where(ndvi > 0.5, {FOREST}, where(ndvi > 0.1, {VEGETATION}, "
+    f"where(ndvi >= -0.1, {BARREN}, {OTHER})))))"
+)
+
+
+def _classify_bands_numexpr(green, red, nir, swir, out_labels):
+    """
+    Calculate the spectral indices and classify every pixel with numexpr
+
+    Args:
+        green, red, nir, swir (numpy.ndarray): 2D band arrays of equal shape
+        out_labels (numpy.ndarray): Preallocated 2D uint8 output array
+    """
+    ndvi, ndwi, ndbi = (np.empty(out_labels.shape, dtype=np.float32) for _ in range(3))
+    ne.evaluate(NORMALIZED_DIFFERENCE, local_dict={'a': nir, 'b': red, 'eps': EPS}, out=ndvi)
+    ne.evaluate(NORMALIZED_DIFFERENCE, local_dict={'a': green, 'b': nir, 'eps': EPS}, out=ndwi)
+    ne.evaluate(NORMALIZED_DIFFERENCE, local_dict={'a': swir, 'b': nir, 'eps': EPS}, out=ndbi)
+    # numexpr has no uint8 output type
+    out_labels[...] = ne.evaluate(LABEL, local_dict={'ndvi': ndvi, 'ndwi': ndwi, 'ndbi': ndbi})
+
+
+if NUMBA_AVAILABLE:
+    @njit(fastmath=FASTMATH, inline='always')
+    def _normalized_difference(a, b):
+        d = (a - b) / (a + b + EPS)
+        return min(max(d, -1.0), 1.0)
+
+    @njit(inline='always')
+    def _label(ndvi, ndwi, ndbi):
+        # Priority: water > built-up > forest > vegetation > barren > other
+        if ndwi > 0:
+            return WATER
+        elif ndbi > 0:
+            return BUILT_UP
+        elif ndvi > 0.5:
+            return FOREST
+        elif ndvi > 0.1:
+            return VEGETATION
+        elif ndvi >= -0.1:
+            return BARREN
+        return OTHER
+
+    @njit(parallel=True, fastmath=FASTMATH, cache=True)
+    def _classify_bands(green, red, nir, swir, out_labels):
+        """
+        Calculate the spectral indices and classify every pixel in one pass
+        The indices stay in registers, so only the label raster is written
+
+        Args:
+            green, red, nir, swir (numpy.ndarray): 2D band arrays of equal shape
+            out_labels (numpy.ndarray): Preallocated 2D uint8 output array
+        """
+        rows, cols = out_labels.shape
+        for i in prange(rows):
+            for j in range(cols):
+                n = nir[i, j]
+                out_labels[i, j] = _label(
+                    _normalized_difference(n, red[i, j]),
+                    _normalized_difference(green[i, j], n),
+                    _normalized_difference(swir[i, j], n)
+                )
+
+    def _launches_serialized():
+        try:
+            return threading_layer() == "workqueue"
+        except ValueError:
+            # No layer is chosen until the first parallel launch
+            return True
+
+    def classify_bands(green, red, nir, swir, out_labels):
+        """
+        Run the fused index + classification kernel, one launch at a time
+        when Numba uses the workqueue threading layer
+
+        Args:
+            green, red, nir, swir (numpy.ndarray): 2D band arrays of equal shape
+            out_labels (numpy.ndarray): Preallocated 2D uint8 output array
+        """
+        if _launches_serialized():
+            with _launch_lock:
+                _classify_bands(green, red, nir, swir, out_labels)
+        else:
+            _classify_bands(green, red, nir, swir, out_labels)
+
+else:
+    classify_bands = _classify_bands_numexpr
+
+
+def _check_block():
+    """
+    Build a 16x16 block of 8-bit-range bands with the cases the kernels must
+    agree on: NaN nodata in every band or in a single band, infinities and
+    all-zero pixels. 16 columns are enough for the inner loop to vectorize
+    """
+    rng = np.random.default_rng(0)
+    green, red, nir, swir = rng.integers(0, 256, (4, 16, 16)).astype(np.float32)
+    for band in (green, red, nir, swir):
+        band[0] = np.nan
+    for k, band in enumerate((green, red, nir, swir), start=1):
+        band[k, ::2] = np.nan
+        band[k + 4, 1::2] = np.inf
+    for band in (green, red, nir, swir):
+        band[9] = 0
+    return green, red, nir, swir
+
+
+def warmup():
+    """
+    Compile (or load from the on-disk cache) classify_bands for the
+    C-contiguous float32 strips read_and_classify passes, so the first real
+    analysis pays no JIT cost
+
+    The result is checked against the numexpr fallback, so a kernel
+    change that makes the result depend on whether Numba is installed fails
+    here instead of silently shifting the class percentages
+
+    Raises:
+        RuntimeError: If classify_bands and the numexpr fallback disagree
+    """
+    green, red, nir, swir = _check_block()
+    labels = np.empty((16, 16), dtype=np.uint8)
+    expected = np.empty((16, 16), dtype=np.uint8)
+    classify_bands(green, red, nir, swir, labels)
+    _classify_bands_numexpr(green, red, nir, swir, expected)
+    if not np.array_equal(labels, expected):
+        raise RuntimeError(
+            f"classify_bands disagrees with the numexpr fallback on {np.count_nonzero(labels != expected)} pixels"
+        )
@@ -1,12 +1,24 @@
 from fastapi import FastAPI, UploadFile, File, HTTPException
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
+import asyncio
 import shutil
+import io
 import os
+import time
+import uuid
+from contextlib import asynccontextmanager
 from pathlib import Path
 import logging
 
+# Analyses run in several request threads at once. Prefer Numba's OpenMP
+# threading layer: workqueue serializes concurrent kernel launches, and TBB
+# keeps the process from exiting. Must be set before Numba is imported;
+# the pool workers inherit it
+os.environ.setdefault("NUMBA_THREADING_LAYER_PRIORITY", "omp tbb workqueue")
+
 from lulc import run_lulc_change_analysis
+from lulc_kernels import warmup
 
 # Configure logging
 logging.basicConfig(
@@ -15,7 +27,22 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Warm up the LULC kernels before the first request
+    Small images are analyzed in this process, so it needs the compiled
+    kernels as much as the pool workers do. This runs on the main thread,
+    before any request thread launches a kernel
+    """
+    logger.info("Warming up LULC kernels...")
+    warmup()
+    logger.info("LULC kernels ready")
+    yield
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Enable CORS
 app.add_middleware(
@@ -30,6 +57,12 @@ app.add_middleware(
 OUTPUT_DIR = "./outputs"
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+# Per-request output directories older than this (seconds) are deleted
+OUTPUT_RETENTION_SECONDS = 30 * 60
+
+# Chunk size for buffered upload copies
+COPY_CHUNK_SIZE = 1024 * 1024
+
 def validate_tif_file(file: UploadFile) -> bool:
     """
     Validate if uploaded file is a TIF/TIFF image
@@ -46,6 +79,101 @@ def validate_tif_file(file: UploadFile) -> bool:
     return is_valid
 
 
+def save_upload(file: UploadFile, path: str) -> None:
+    """
+    Save an uploaded file to disk
+    Uploads that were spooled to disk are copied in the kernel with
+    os.sendfile; in-memory uploads are copied in 1 MiB chunks
+    
+    Args:
+        file (UploadFile): Uploaded file
+        path (str): Destination path
+    """
+    src = file.file
+    src.seek(0)
+    
+    with open(path, "wb") as f:
+        # Same check Starlette uses: SpooledTemporaryFile._rolled is set once it spills to disk
+        if getattr(src, "_rolled", True):
+            try:
+                fd_in = src.fileno()
+                size = os.fstat(fd_in).st_size
+                offset = 0
+                while offset < size:
+                    sent = os.sendfile(f.fileno(), fd_in, offset, size - offset)
+                    if sent == 0:
+                        break
+                    offset += sent
+                if offset == size:
+                    return
+                # Copy whatever sendfile did not manage to transfer
+                src.seek(offset)
+            except (AttributeError, OSError, io.UnsupportedOperation):
+                # No real file descriptor, or sendfile unsupported on this platform
+                src.seek(0)
+                f.seek(0)
+                f.truncate()
+        
+        shutil.copyfileobj(src, f, length=COPY_CHUNK_SIZE)
+
+
+def remove_expired_outputs() -> None:
+    """
+    Delete per-request output directories last modified more than
+    OUTPUT_RETENTION_SECONDS ago, so disk use stays bounded
+    A directory is modified while its analysis writes to it, so
+    in-progress outputs are never expired
+    """
+    cutoff = time.time() - OUTPUT_RETENTION_SECONDS
+    with os.scandir(OUTPUT_DIR) as entries:
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False) and entry.stat().st_mtime < cutoff:
+                    shutil.rmtree(entry.path)
+                    logger.info(f"Removed expired outputs {entry.path}")
+            except OSError as e:
+                # e.g. removed concurrently by another request
+                logger.warning(f"Could not remove expired outputs {entry.path}: {str(e)}")
+
+
+def save_and_analyze(image1: UploadFile, image2: UploadFile, image1_path: str, image2_path: str, output_dir: str) -> dict:
+    """
+    Save both uploads and run the analysis on them
+    Copying large uploads and the analysis itself both block, so the
+    endpoint runs this whole function in a worker thread
+    
+    Args:
+        image1 (UploadFile): First uploaded image
+        image2 (UploadFile): Second uploaded image
+        image1_path (str): Path to save the first image to
+        image2_path (str): Path to save the second image to
+        output_dir (str): Directory to save outputs
+        
+    Returns:
+        dict: Analysis results from run_lulc_change_analysis
+    """
+    remove_expired_outputs()
+    
+    logger.info("Saving uploaded files...")
+    
+    save_upload(image1, image1_path)
+    save_upload(image2, image2_path)
+    
+    logger.info(f"Files saved. Size 1: {os.path.getsize(image1_path)} bytes")
+    logger.info(f"Files saved. Size 2: {os.path.getsize(image2_path)} bytes")
+    
+    logger.info("Starting LULC analysis...")
+    
+    # Run analysis with original filenames
+    return run_lulc_change_analysis(
+        image1_path, 
+        image2_path, 
+        output_dir,
+        image1.filename,
+        image2.filename
+    )
+
+
 @app.post("/analyze")
 async def analyze(
     image1: UploadFile = File(...),
@@ -79,31 +207,21 @@ async def analyze(
             detail=f"Invalid file type for Image 2: {image2.filename}. Please upload a valid .TIF or .TIFF file."
         )
     
-    # Save uploaded files
-    image1_path = "image1.tif"
-    image2_path = "image2.tif"
+    # Save uploads and outputs under per-request names so concurrent requests don't collide
+    request_id = uuid.uuid4().hex
+    image1_path = f"{request_id}_image1.tif"
+    image2_path = f"{request_id}_image2.tif"
+    output_dir = os.path.join(OUTPUT_DIR, request_id)
     
     try:
-        logger.info("Saving uploaded files...")
-        
-        with open(image1_path, "wb") as f:
-            shutil.copyfileobj(image1.file, f)
-        
-        with open(image2_path, "wb") as f:
-            shutil.copyfileobj(image2.file, f)
-        
-        logger.info(f"Files saved. Size 1: {os.path.getsize(image1_path)} bytes")
-        logger.info(f"Files saved. Size 2: {os.path.getsize(image2_path)} bytes")
-        
-        logger.info("Starting LULC analysis...")
-        
-        # Run analysis with original filenames
-        results = run_lulc_change_analysis(
-            image1_path, 
-            image2_path, 
-            OUTPUT_DIR,
-            image1.filename,
-            image2.filename
+        # Save the uploads and run the analysis off the event loop
+        results = await asyncio.to_thread(
+            save_and_analyze,
+            image1,
+            image2,
+            image1_path,
+            image2_path,
+            output_dir
         )
         
         logger.info("Analysis completed successfully")
@@ -112,11 +230,11 @@ async def analyze(
         return {
             "results": results,
             "outputs": {
-                "preview_image1": f"/static/preview_image1.png",
-                "preview_image2": f"/static/preview_image2.png",
-                "change_map": f"/static/change_map.png",
-                "comparison_graph": f"/static/comparison_graph.png",
-                "change_matrix": f"/static/change_matrix.csv"
+                "preview_image1": f"/static/{request_id}/preview_image1.png",
+                "preview_image2": f"/static/{request_id}/preview_image2.png",
+                "change_map": f"/static/{request_id}/change_map.png",
+                "comparison_graph": f"/static/{request_id}/comparison_graph.png",
+                "change_matrix": f"/static/{request_id}/change_matrix.csv"
             }
         }
     
@@ -128,10 +246,10 @@ async def analyze(
         # Cleanup uploaded temporary files
         if os.path.exists(image1_path):
             os.remove(image1_path)
-            logger.info("Cleaned up image1.tif")
+            logger.info(f"Cleaned up {image1_path}")
         if os.path.exists(image2_path):
             os.remove(image2_path)
-            logger.info("Cleaned up image2.tif")
+            logger.info(f"Cleaned up {image2_path}")
 
 
 # Serve output files